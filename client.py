@@ -1,31 +1,112 @@
 import asyncio
 import os
 import platform
+import random
 import re
 import time
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Awaitable, Callable, Coroutine
 from typing import Any
 
+import httpx
 import mcp.types as types
+import orjson
 from dotenv import load_dotenv
 from mcp.client.websocket import websocket_client
 from mcp.server.lowlevel import Server
-from notion_client import Client
+from notion_client import APIResponseError, AsyncClient
 
 load_dotenv()
 
+
+def _resolve_toolset() -> str:
+    return "minimal" if os.getenv("NOTION_BRIDGE_TOOLSET", "").strip().lower() == "minimal" else "full"
+
+
+_FULL_INSTRUCTIONS = (
+    "You are a dialogue assistant with STRICT mandatory MCP tool usage. "
+    "On EVERY user turn, call import_mcp_context first using the user's utterance, then answer. "
+    "For any Notion-related intent (notion/page/document/notes/read/summarize), "
+    "you MUST call one of these tools before answering: import_mcp_context, study_notion_notes, "
+    "read_notion_page, get_notion_page, list_notion_blocks. "
+    "Never claim you cannot access notes unless tool call fails. "
+    "你是对话助手，必须严格使用 MCP 工具。每一轮对话先调用 import_mcp_context（传用户原话）再回答。"
+)
+
+# NOTION_BRIDGE_TOOLSET=minimal exposes only the by-page reader and the debug tool,
+# so its instructions must not mention any other tool.
+_MINIMAL_TOOL_NAMES = frozenset({"get_notion_page", "list_notion_blocks"})
+_MINIMAL_INSTRUCTIONS = (
+    "You are a dialogue assistant with STRICT mandatory MCP tool usage. "
+    "For any Notion-related intent (notion/page/document/notes/read/summarize), "
+    "you MUST call get_notion_page before answering, passing the user's utterance as query or a page_id. "
+    "Use list_notion_blocks to inspect a page's block structure. "
+    "Never claim you cannot access notes unless tool call fails. "
+    "你是对话助手，必须严格使用 MCP 工具。涉及 Notion 的请求先调用 get_notion_page（传用户原话）再回答。"
+)
+
 server = Server(
     "NotionBridge",
-    instructions=(
-        "You are a dialogue assistant with STRICT mandatory MCP tool usage. "
-        "On EVERY user turn, call import_mcp_context first using the user's utterance, then answer. "
-        "For any Notion-related intent (notion/page/document/notes/read/summarize), "
-        "you MUST call one of these tools before answering: import_mcp_context, study_notion_notes, "
-        "read_notion_page, get_notion_page, list_notion_blocks. "
-        "Never claim you cannot access notes unless tool call fails. "
-        "你是对话助手，必须严格使用 MCP 工具。每一轮对话先调用 import_mcp_context（传用户原话）再回答。"
-    ),
+    instructions=_MINIMAL_INSTRUCTIONS if _resolve_toolset() == "minimal" else _FULL_INSTRUCTIONS,
+)
+notion: AsyncClient | None = None
+
+_TOKEN_SPLIT_RE = re.compile(r"[^a-zA-Z0-9\u4e00-\u9fff]+")
+# Bare or dashed page ids, including the trailing id of a pasted notion.so URL.
+_NOTION_ID_RE = re.compile(
+    r"(?<![0-9a-f])([0-9a-f]{32}|[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12})(?![0-9a-f])",
+    re.I,
+)
+
+_SEARCH_CACHE_MAXSIZE = 256
+_SEARCH_CACHE_TTL_SECONDS = 300
+# normalized query -> (cached_at, (page_id, title))
+_SEARCH_CACHE: OrderedDict[str, tuple[float, tuple[str, str]]] = OrderedDict()
+
+# Largest page_size Notion accepts for list endpoints.
+_MAX_PAGE_SIZE = 100
+# import_mcp_context runs on every turn and only needs the start of a page; its result
+# carries truncated=True when blocks were left unread. summarize_notion_page reads it all.
+_PREVIEW_MAX_BLOCKS = 50
+_PREVIEW_TOOLS = frozenset({"import_mcp_context"})
+
+# Block types whose payload carries rich_text; dividers, images, columns etc. never do.
+_TEXT_BLOCK_TYPES = frozenset(
+    {
+        "paragraph",
+        "heading_1",
+        "heading_2",
+        "heading_3",
+        "bulleted_list_item",
+        "numbered_list_item",
+        "to_do",
+        "toggle",
+        "quote",
+        "callout",
+        "code",
+        "template",
+    }
+)
+
+_PAGE_READ_ALIASES = frozenset(
+    {
+        "get_notion_page",
+        "read_notion_page",
+        "read_page_content",
+        "summarize_notion_page",
+        "study_notion_notes",
+        "import_mcp_context",
+    }
 )
-notion: Client | None = None
+_ALL_KNOWN_TOOLS = _PAGE_READ_ALIASES | frozenset({"list_notion_blocks"})
+
+_RESULT_CACHE_MAXSIZE = 64
+# Notion rounds last_edited_time to the minute, so an edit made later in the same minute
+# as the cached read leaves it unchanged. Entries therefore also expire after this TTL,
+# which bounds how long such a same-minute edit can be served stale.
+_RESULT_CACHE_TTL_SECONDS = 60
+# (result kind, page_id) -> (last_edited_time, cached_at, result without matched_by_query_title)
+_RESULT_CACHE: OrderedDict[tuple[str, str], tuple[str, float, dict[str, Any]]] = OrderedDict()
 
 READ_NOTION_PAGE_SCHEMA = {
     "type": "object",
@@ -44,22 +125,8 @@ READ_NOTION_PAGE_SCHEMA = {
     "additionalProperties": False,
 }
 
-LIST_NOTION_BLOCKS_SCHEMA = {
-    "type": "object",
-    "properties": {
-        "page_id": {"type": "string"},
-        "query": {"type": "string"},
-        "keyword": {"type": "string"},
-        "utterance": {"type": "string"},
-    },
-    "anyOf": [
-        {"required": ["page_id"]},
-        {"required": ["query"]},
-        {"required": ["keyword"]},
-        {"required": ["utterance"]},
-    ],
-    "additionalProperties": False,
-}
+# Same inputs as the page readers; kept as its own name for the debug tool.
+LIST_NOTION_BLOCKS_SCHEMA = READ_NOTION_PAGE_SCHEMA
 
 
 def _extract_rich_text(block: dict[str, Any]) -> str:
@@ -70,213 +137,383 @@ def _extract_rich_text(block: dict[str, Any]) -> str:
 
 
 def _extract_title(page: dict[str, Any]) -> str:
-    properties = page.get("properties", {})
-    for value in properties.values():
-        if isinstance(value, dict) and value.get("type") == "title":
-            title_items = value.get("title", [])
-            title = "".join(item.get("plain_text", "") for item in title_items).strip()
-            if title:
-                return title
+    # A Notion page has exactly one title property, so stop at the first one.
+    for value in page.get("properties", {}).values():
+        if type(value) is dict and value.get("type") == "title":
+            title_items = value.get("title") or []
+            if not title_items:
+                return "Untitled"
+            title = "".join([item["plain_text"] for item in title_items if "plain_text" in item]).strip()
+            return title or "Untitled"
     return "Untitled"
 
 
 def _tokenize(text: str) -> list[str]:
-    parts = re.split(r"[^a-zA-Z0-9\u4e00-\u9fff]+", text.lower())
-    return [p for p in parts if p]
+    return [p for p in _TOKEN_SPLIT_RE.split(text.lower()) if p]
 
 
-def _score_title_match(title: str, query_text: str) -> int:
-    title_tokens = set(_tokenize(title))
-    query_tokens = _tokenize(query_text)
+def _score_title_match(title: str, query_tokens: list[str], is_resume_intent: bool) -> int:
+    title_lower = title.lower()
+    title_tokens = set(_TOKEN_SPLIT_RE.split(title_lower))
     score = 0
     for token in query_tokens:
         if token in title_tokens:
             score += 3
-        elif token and token in title.lower():
+        elif token in title_lower:
             score += 1
     # Prioritize resume-study intents.
-    if ("resume" in query_text.lower() or "简历" in query_text) and ("resume" in title.lower() or "简历" in title):
+    if is_resume_intent and ("resume" in title_lower or "简历" in title_lower):
         score += 4
     return score
 
 
-def _search_page_by_text(query_text: str) -> tuple[str, str]:
+async def _search_page_by_text(query_text: str) -> tuple[str, str]:
     if notion is None:
         raise RuntimeError("Notion client is not initialized")
 
-    resp = notion.search(
+    query_tokens = _tokenize(query_text)
+    # Query-side scoring inputs are computed once, not per candidate title.
+    is_resume_intent = "resume" in query_text.lower() or "简历" in query_text
+    # Short ASCII queries almost always match within the top few results. CJK text has no
+    # spaces, so a whole Chinese utterance is one token and must not count as short.
+    page_size = 5 if query_text.isascii() and len(query_tokens) < 3 else 10
+    resp = await notion.search(
         query=query_text,
         filter={"value": "page", "property": "object"},
-        page_size=10,
+        page_size=page_size,
     )
     results = resp.get("results", [])
     if not results:
         raise ValueError(f"No Notion page found for query: {query_text}")
 
-    best_page: dict[str, Any] | None = None
-    best_score = -1
-    for page in results:
-        title = _extract_title(page)
-        score = _score_title_match(title, query_text)
-        if score > best_score:
-            best_score = score
-            best_page = page
-    chosen = best_page or results[0]
+    # Extract every title once; the winner's title is reused for the response.
+    candidates = [(_extract_title(page), page) for page in results]
+    chosen_title, chosen = max(
+        candidates, key=lambda candidate: _score_title_match(candidate[0], query_tokens, is_resume_intent)
+    )
     chosen_id = chosen.get("id")
     if not chosen_id:
         raise ValueError(f"Found result without page id for query: {query_text}")
-    return chosen_id, _extract_title(chosen)
+    return chosen_id, chosen_title
+
+
+def _normalize_query(query_text: str) -> str:
+    return " ".join(query_text.lower().split())
+
 
+async def _search_page_by_text_cached(query_text: str) -> tuple[str, str]:
+    key = _normalize_query(query_text)
+    now = time.monotonic()
+    cached = _SEARCH_CACHE.get(key)
+    if cached is not None and now - cached[0] < _SEARCH_CACHE_TTL_SECONDS:
+        _SEARCH_CACHE.move_to_end(key)
+        return cached[1]
 
-def _resolve_page_id(arguments: dict[str, Any]) -> tuple[str, str | None]:
+    match = await _search_page_by_text(query_text)
+    _SEARCH_CACHE[key] = (now, match)
+    _SEARCH_CACHE.move_to_end(key)
+    while len(_SEARCH_CACHE) > _SEARCH_CACHE_MAXSIZE:
+        _SEARCH_CACHE.popitem(last=False)
+    return match
+
+
+async def _resolve_page_id(arguments: dict[str, Any]) -> tuple[str, str | None, dict[str, Any] | None]:
+    # Returns (page_id, matched_title, page); page is set when resolving already retrieved it.
     page_id = arguments.get("page_id")
     if isinstance(page_id, str) and page_id.strip():
-        return page_id.strip(), None
+        return page_id.strip(), None, None
 
     query_text = arguments.get("query") or arguments.get("keyword") or arguments.get("utterance")
     if isinstance(query_text, str) and query_text.strip():
-        resolved_page_id, matched_title = _search_page_by_text(query_text.strip())
-        return resolved_page_id, matched_title
+        id_match = _NOTION_ID_RE.search(query_text)
+        if id_match:
+            # An id in free text may be an MD5 hash or a database/view id, so confirm it is a
+            # page and fall back to search otherwise. An explicit page_id still fails hard.
+            candidate_id = id_match.group(1).replace("-", "").lower()
+            try:
+                return candidate_id, None, await _fetch_page(candidate_id)
+            except APIResponseError:
+                pass
+        resolved_page_id, matched_title = await _search_page_by_text_cached(query_text.strip())
+        return resolved_page_id, matched_title, None
 
     raise ValueError("Please provide page_id or query/keyword")
 
 
 def _extract_text_from_blocks(blocks: list[dict[str, Any]]) -> str:
+    # Inlined _extract_rich_text: this runs once per block on every page read.
     lines: list[str] = []
     for block in blocks:
-        text = _extract_rich_text(block)
+        block_type = block.get("type")
+        if block_type not in _TEXT_BLOCK_TYPES:
+            continue
+        rich_text = block.get(block_type, {}).get("rich_text", [])
+        text = "".join([item.get("plain_text", "") for item in rich_text]).strip()
         if text:
             lines.append(text)
     return "\n".join(lines)
 
 
-def _fetch_all_blocks(page_id: str) -> list[dict[str, Any]]:
+def _page_size(remaining: int | None) -> int:
+    return _MAX_PAGE_SIZE if remaining is None else min(_MAX_PAGE_SIZE, remaining)
+
+
+async def _paginate(
+    list_fn: Callable[..., Awaitable[dict[str, Any]]], max_results: int | None = None, **params: Any
+) -> AsyncIterator[tuple[list[dict[str, Any]], bool]]:
+    # Yields (batch, has_more) for a cursor-paginated list endpoint, prefetching the next batch.
+    # has_more on the last batch means max_results cut the listing short.
+    remaining = max_results
+    next_task: asyncio.Task[dict[str, Any]] | None = asyncio.create_task(
+        list_fn(start_cursor=None, page_size=_page_size(remaining), **params)
+    )
+    try:
+        while next_task is not None:
+            resp = await next_task
+            next_task = None
+            results = resp.get("results", [])
+            batch = results if remaining is None else results[:remaining]
+            has_more = bool(resp.get("has_more")) or len(batch) < len(results)
+            if remaining is not None:
+                remaining -= len(batch)
+            # Request the next batch before handing this one to the caller.
+            if resp.get("has_more") and remaining != 0:
+                next_task = asyncio.create_task(
+                    list_fn(start_cursor=resp.get("next_cursor"), page_size=_page_size(remaining), **params)
+                )
+            yield batch, has_more
+    finally:
+        if next_task is not None:
+            next_task.cancel()
+
+
+def _iter_block_batches(
+    page_id: str, max_blocks: int | None = None
+) -> AsyncIterator[tuple[list[dict[str, Any]], bool]]:
     if notion is None:
         raise RuntimeError("Notion client is not initialized")
+    return _paginate(notion.blocks.children.list, max_blocks, block_id=page_id)
 
-    blocks: list[dict[str, Any]] = []
-    cursor: str | None = None
-    while True:
-        blocks_resp = notion.blocks.children.list(block_id=page_id, page_size=100, start_cursor=cursor)
-        blocks.extend(blocks_resp.get("results", []))
-        if not blocks_resp.get("has_more"):
-            break
-        cursor = blocks_resp.get("next_cursor")
-    return blocks
 
+async def _extract_text_streaming(page_id: str, max_blocks: int | None = None) -> tuple[str, bool]:
+    # Extract each batch as it arrives so raw block dicts never pile up.
+    chunks: list[str] = []
+    truncated = False
+    async for batch, has_more in _iter_block_batches(page_id, max_blocks):
+        truncated = has_more
+        text = _extract_text_from_blocks(batch)
+        if text:
+            chunks.append(text)
+    return "\n".join(chunks), truncated
 
-@server.list_tools()
-async def list_tools() -> list[types.Tool]:
-    return [
-        types.Tool(
-            name="get_notion_page",
-            description=(
-                "读取 Notion 页面内容（标题+正文纯文本）/ Read Notion page content (title + plain text). "
-                "触发词 Trigger words: Notion, 页面, page, 笔记, 文档, 读取内容, summarize page. "
-                "参数支持 page_id 或 query/keyword/utterance（自动搜索页面）/ Supports page_id or query/keyword/utterance."
-            ),
-            inputSchema=READ_NOTION_PAGE_SCHEMA,
+
+async def _summarize_blocks_streaming(page_id: str) -> list[dict[str, Any]]:
+    result_blocks: list[dict[str, Any]] = []
+    async for batch, _ in _iter_block_batches(page_id):
+        for block in batch:
+            result_blocks.append(
+                {
+                    "index": len(result_blocks),
+                    "id": block.get("id"),
+                    "type": block.get("type"),
+                    "has_children": block.get("has_children", False),
+                    "text": _extract_rich_text(block),
+                }
+            )
+    return result_blocks
+
+
+def _get_revalidated(
+    cache: OrderedDict[Any, tuple[str, float, Any]], key: Any, last_edited_time: str | None, ttl_seconds: float
+) -> Any:
+    cached = cache.get(key)
+    if cached is None or not last_edited_time or cached[0] != last_edited_time:
+        return None
+    if time.monotonic() - cached[1] >= ttl_seconds:
+        del cache[key]
+        return None
+    cache.move_to_end(key)
+    return cached[2]
+
+
+def _store_revalidated(
+    cache: OrderedDict[Any, tuple[str, float, Any]], key: Any, last_edited_time: str | None, value: Any, maxsize: int
+) -> None:
+    if not last_edited_time:
+        return
+    cache[key] = (last_edited_time, time.monotonic(), value)
+    cache.move_to_end(key)
+    while len(cache) > maxsize:
+        cache.popitem(last=False)
+
+
+async def _fetch_page(page_id: str) -> dict[str, Any]:
+    if notion is None:
+        raise RuntimeError("Notion client is not initialized")
+    return await notion.pages.retrieve(page_id=page_id)
+
+
+async def _fetch_page_metadata(name: str, page_id: str) -> dict[str, Any]:
+    if name != "list_notion_blocks":
+        return await _fetch_page(page_id)
+    try:
+        return await _fetch_page(page_id)
+    except APIResponseError:
+        # list_notion_blocks also takes child block ids, which have no page metadata. Without
+        # a last_edited_time the listing is returned but never cached.
+        return {}
+
+
+async def _fetch_page_while_rendering(
+    name: str, page_id: str, render: Coroutine[Any, Any, Any]
+) -> tuple[dict[str, Any], Any]:
+    # Fetch metadata alongside the render, but stop the block download if the metadata fails.
+    render_task = asyncio.create_task(render)
+    try:
+        page = await _fetch_page_metadata(name, page_id)
+    except BaseException:
+        render_task.cancel()
+        raise
+    return page, await render_task
+
+
+_TOOLS = [
+    types.Tool(
+        name="get_notion_page",
+        description=(
+            "读取 Notion 页面内容（标题+正文纯文本）/ Read Notion page content (title + plain text). "
+            "触发词 Trigger words: Notion, 页面, page, 笔记, 文档, 读取内容, summarize page. "
+            "参数支持 page_id 或 query/keyword/utterance（自动搜索页面）/ Supports page_id or query/keyword/utterance."
         ),
-        types.Tool(
-            name="read_notion_page",
-            description=(
-                "get_notion_page 的语义别名（同功能）/ Semantic alias of get_notion_page. "
-                "触发词 Trigger words: 读取Notion页面, read notion page, 查看页面内容, page content."
-            ),
-            inputSchema=READ_NOTION_PAGE_SCHEMA,
+        inputSchema=READ_NOTION_PAGE_SCHEMA,
+    ),
+    types.Tool(
+        name="read_notion_page",
+        description=(
+            "get_notion_page 的语义别名（同功能）/ Semantic alias of get_notion_page. "
+            "触发词 Trigger words: 读取Notion页面, read notion page, 查看页面内容, page content."
         ),
-        types.Tool(
-            name="study_notion_notes",
-            description=(
-                "按自然语言学习意图读取相关 Notion 笔记 / Read relevant Notion notes from natural-language intent. "
-                "示例 Example: '我要复习 Pinterest 的简历笔记'."
-            ),
-            inputSchema=READ_NOTION_PAGE_SCHEMA,
+        inputSchema=READ_NOTION_PAGE_SCHEMA,
+    ),
+    types.Tool(
+        name="study_notion_notes",
+        description=(
+            "按自然语言学习意图读取相关 Notion 笔记 / Read relevant Notion notes from natural-language intent. "
+            "示例 Example: '我要复习 Pinterest 的简历笔记'."
         ),
-        types.Tool(
-            name="import_mcp_context",
-            description=(
-                "每轮对话先调用本工具导入 Notion 上下文 / MUST be called first each turn to import Notion context. "
-                "请传 utterance（用户原话）/ Pass utterance (raw user message)."
-            ),
-            inputSchema=READ_NOTION_PAGE_SCHEMA,
+        inputSchema=READ_NOTION_PAGE_SCHEMA,
+    ),
+    types.Tool(
+        name="import_mcp_context",
+        description=(
+            "每轮对话先调用本工具导入 Notion 上下文 / MUST be called first each turn to import Notion context. "
+            "请传 utterance（用户原话）/ Pass utterance (raw user message)."
         ),
-        types.Tool(
-            name="read_page_content",
-            description=(
-                "read_notion_page 的别名（同功能）/ Alias of read_notion_page (same behavior). "
-                "触发词 Trigger words: 读页面, 读取文档, summarize notion doc."
-            ),
-            inputSchema=READ_NOTION_PAGE_SCHEMA,
+        inputSchema=READ_NOTION_PAGE_SCHEMA,
+    ),
+    types.Tool(
+        name="read_page_content",
+        description=(
+            "read_notion_page 的别名（同功能）/ Alias of read_notion_page (same behavior). "
+            "触发词 Trigger words: 读页面, 读取文档, summarize notion doc."
         ),
-        types.Tool(
-            name="summarize_notion_page",
-            description=(
-                "先读取页面内容再供模型总结 / Read page content first for downstream summarization. "
-                "触发词 Trigger words: 总结页面, summarize, extract key points."
-            ),
-            inputSchema=READ_NOTION_PAGE_SCHEMA,
+        inputSchema=READ_NOTION_PAGE_SCHEMA,
+    ),
+    types.Tool(
+        name="summarize_notion_page",
+        description=(
+            "先读取页面内容再供模型总结 / Read page content first for downstream summarization. "
+            "触发词 Trigger words: 总结页面, summarize, extract key points."
         ),
-        types.Tool(
-            name="list_notion_blocks",
-            description=(
-                "列出 Notion 页面 block 结构用于调试 / List Notion block structure for debugging. "
-                "触发词 Trigger words: block, 结构, 调试, 类型, why empty."
-            ),
-            inputSchema=LIST_NOTION_BLOCKS_SCHEMA,
+        inputSchema=READ_NOTION_PAGE_SCHEMA,
+    ),
+    types.Tool(
+        name="list_notion_blocks",
+        description=(
+            "列出 Notion 页面 block 结构用于调试 / List Notion block structure for debugging. "
+            "触发词 Trigger words: block, 结构, 调试, 类型, why empty."
         ),
-    ]
+        inputSchema=LIST_NOTION_BLOCKS_SCHEMA,
+    ),
+]
+
+
+_MINIMAL_TOOLS = [tool for tool in _TOOLS if tool.name in _MINIMAL_TOOL_NAMES]
+
+
+@server.list_tools()
+async def list_tools() -> list[types.Tool]:
+    return _MINIMAL_TOOLS if _resolve_toolset() == "minimal" else _TOOLS
 
 
 @server.call_tool()
-async def call_tool(name: str, arguments: dict[str, Any]) -> dict[str, Any]:
+async def call_tool(name: str, arguments: dict[str, Any]) -> tuple[list[types.TextContent], dict[str, Any]]:
     if notion is None:
         raise RuntimeError("Notion client is not initialized")
 
-    page_read_aliases = {
-        "get_notion_page",
-        "read_notion_page",
-        "read_page_content",
-        "summarize_notion_page",
-        "study_notion_notes",
-        "import_mcp_context",
-    }
-    if name not in page_read_aliases | {"list_notion_blocks"}:
+    listed_tools = _MINIMAL_TOOL_NAMES if _resolve_toolset() == "minimal" else _ALL_KNOWN_TOOLS
+    if name not in listed_tools:
         raise ValueError(f"Unknown tool: {name}")
 
-    page_id, matched_title = _resolve_page_id(arguments)
-    blocks = _fetch_all_blocks(page_id)
-
-    if name in page_read_aliases:
-        page = notion.pages.retrieve(page_id=page_id)
+    page_id, matched_title, page = await _resolve_page_id(arguments)
+    if name == "list_notion_blocks":
+        result_kind = "blocks"
+    elif name in _PREVIEW_TOOLS:
+        result_kind = "preview"
+    else:
+        result_kind = "page"
+    # Aliases that render the same output share one cache entry.
+    cache_key = (result_kind, page_id)
+    if cache_key in _RESULT_CACHE:
+        # A single metadata request decides whether the cached result is still current.
+        if page is None:
+            page = await _fetch_page_metadata(name, page_id)
+        cached_result = _get_revalidated(
+            _RESULT_CACHE, cache_key, page.get("last_edited_time"), _RESULT_CACHE_TTL_SECONDS
+        )
+        if cached_result is not None:
+            return _tool_output(_with_matched_title(name, cached_result, matched_title))
+
+    if name in _PAGE_READ_ALIASES:
+        max_blocks = _PREVIEW_MAX_BLOCKS if result_kind == "preview" else None
+        render = _extract_text_streaming(page_id, max_blocks)
+    else:
+        # Debug-friendly output to inspect the page structure quickly.
+        render = _summarize_blocks_streaming(page_id)
+    if page is None:
+        page, rendered = await _fetch_page_while_rendering(name, page_id, render)
+    else:
+        rendered = await render
+
+    if name in _PAGE_READ_ALIASES:
+        content, truncated = rendered
         result = {
             "page_id": page_id,
             "title": _extract_title(page),
-            "content": _extract_text_from_blocks(blocks),
+            "content": content,
+            "truncated": truncated,
         }
-        if matched_title:
-            result["matched_by_query_title"] = matched_title
-        return result
+    else:
+        result = {
+            "page_id": page_id,
+            "count": len(rendered),
+            "blocks": rendered,
+        }
+    _store_revalidated(_RESULT_CACHE, cache_key, page.get("last_edited_time"), result, _RESULT_CACHE_MAXSIZE)
+    return _tool_output(_with_matched_title(name, result, matched_title))
 
-    # Debug-friendly output to inspect the page structure quickly.
-    result_blocks: list[dict[str, Any]] = []
-    for idx, block in enumerate(blocks):
-        text = _extract_rich_text(block)
-        result_blocks.append(
-            {
-                "index": idx,
-                "id": block.get("id"),
-                "type": block.get("type"),
-                "has_children": block.get("has_children", False),
-                "text": text,
-            }
-        )
-    return {
-        "page_id": page_id,
-        "matched_by_query_title": matched_title,
-        "count": len(result_blocks),
-        "blocks": result_blocks,
-    }
+
+def _with_matched_title(name: str, result: dict[str, Any], matched_title: str | None) -> dict[str, Any]:
+    # Cached results are shared across queries, so never mutate them in place.
+    if name == "list_notion_blocks" or matched_title:
+        return {**result, "matched_by_query_title": matched_title}
+    return result
+
+
+def _tool_output(result: dict[str, Any]) -> tuple[list[types.TextContent], dict[str, Any]]:
+    # Returning (content, structured) keeps the server from re-serializing with json.dumps.
+    text = orjson.dumps(result, option=orjson.OPT_INDENT_2).decode()
+    return [types.TextContent(type="text", text=text)], result
 
 
 def _resolve_endpoint() -> str | None:
@@ -290,6 +527,7 @@ def _print_local_context() -> None:
     print(f"[context] platform={platform.system()} {platform.release()}")
     print(f"[context] has_NOTION_TOKEN={bool(os.getenv('NOTION_TOKEN'))}")
     print(f"[context] has_endpoint={bool(_resolve_endpoint())}")
+    print(f"[context] toolset={_resolve_toolset()}")
 
 
 async def _run_once(endpoint: str) -> None:
@@ -309,19 +547,26 @@ async def main() -> None:
         raise RuntimeError("Missing NOTION_TOKEN")
     if not endpoint:
         raise RuntimeError("Missing XIAOZHI_WSS or MCP_ENDPOINT")
-    notion = Client(auth=token)
+    # One pooled HTTP/2 connection is shared by all concurrent Notion requests.
+    http_client = httpx.AsyncClient(http2=True, limits=httpx.Limits(max_keepalive_connections=10))
+    notion = AsyncClient(auth=token, client=http_client)
 
     delay_seconds = 1
-    while True:
-        try:
-            await _run_once(endpoint)
-            # server.run normally blocks; if it exits, reset backoff and retry.
-            delay_seconds = 1
-        except Exception as exc:
-            print(f"Connection error: {exc}")
-            print(f"Retrying in {delay_seconds}s...")
-            await asyncio.sleep(delay_seconds)
-            delay_seconds = min(delay_seconds * 2, 60)
+    try:
+        while True:
+            try:
+                await _run_once(endpoint)
+                # server.run normally blocks; if it exits, reset backoff and retry.
+                delay_seconds = 1
+            except Exception as exc:
+                # Jitter keeps multiple instances from reconnecting in lockstep after a shared outage.
+                sleep_seconds = random.uniform(delay_seconds / 2, delay_seconds)
+                print(f"Connection error: {exc}")
+                print(f"Retrying in {sleep_seconds:.1f}s...")
+                await asyncio.sleep(sleep_seconds)
+                delay_seconds = min(delay_seconds * 2, 60)
+    finally:
+        await notion.aclose()
 
 
 if __name__ == "__main__":